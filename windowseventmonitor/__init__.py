@@ -0,0 +1,2 @@
+from windowseventmonitor.event_monitor import Event_Monitor
+from windowseventmonitor.monitor import Monitor
@@ -1,176 +1,238 @@
-import json
-import sys
-import os
-from datetime import datetime, timedelta
-from collections import defaultdict
-
-from windowseventmonitor import monitor_thread
-
-
-
-class Event_Monitor:
-    """
-    Class is an application that monitors Windows Event Logs.
-
-    Parameter config_file (string): File containing necessary data
-
-    Parameter retry_delta (datetime.timedelta): Kwarg that sets how
-    often the program should attempt to respawn threads. Defaults to 5 minutes.
-
-    Parameter export_delta (datetime.timedelta): Kwarg that sets how
-    often the program exports data. Defaults to 1 hour.
-    """
-    def __init__(self, config_file, retry_delta = timedelta(minutes = 5), export_delta = timedelta(hours = 1)):
-        try:
-            with open(config_file, "r") as config:
-                data = json.loads(config.read())
-        except:
-            raise FileNotFoundError("Config file not found")
-
-        self.app_start = datetime.now()
-        self.active_threads = []
-        self.servers = set()
-        for server in data["Servers"]:
-            self.servers.add(server)
-            for log_type in data["Servers"][server]:
-                event_IDs = data["Servers"][server][log_type]
-                thread = monitor_thread.Monitor_Thread(server, log_type, event_IDs)
-                self.active_threads.append(thread)
-        self.threads_to_restart = []
-        self.retry_delta = retry_delta
-        self.export_delta = export_delta
-
-
-    def run(self):
-        """
-        Main thread of execution. run() ensures that spawned Monitor_Threads
-        stay alive. If any are found dead, it attempts to start a new thread
-        with the dead Monitor_Thread's data in case the problem is temporary.
-
-        Stoppable with Ctrl+C.
-        """
-        start = datetime.now()
-        for thread in self.get_active_threads(): thread.start()
-        try: # Runs concurrently with threads
-            while True:
-                for thread in self.get_active_threads():
-                    if not thread.is_alive():
-                        self.get_dead_threads().append(thread.respawn_thread(self.get_retry_delta()))
-                        thread.add_thread_failure()
-                        thread.acknowledged_failure = True
-                # Don't remove threads that died AFTER iteration
-                self.remove_dead_threads()
-
-                for thread in self.get_dead_threads():
-                    if not thread.failure_printed_to_console:
-                        print(f"{thread.name} failed. Will attempt restart in {self.get_retry_delta()}")
-                        thread.failure_printed_to_console = True
-
-                    if thread.restart_time < datetime.now():
-                        print(f"Attempting to restart {thread.name}")
-                        thread.failure_printed_to_console = False
-                        thread.restart_time = None
-                        thread.start()
-                        self.get_active_threads().append(thread)
-                # Remove threads that have respawned
-                self.remove_respawned_threads()
-
-                # Export after time specified by delta
-                if datetime.now() >= start + self.get_export_delta():
-                    self.export_json()
-                    start = datetime.now()
-
-        except KeyboardInterrupt:
-            print("Keyboard interrupt")
-        except Exception as err:
-            print(err)
-        finally: # Save necessary data before exit
-            self.export_json()
-            print("Exiting program")
-            sys.exit(0)
-
-
-    def export_json(self):
-        """Writes data from application to json file."""
-        export_timestamp = datetime.now().timestamp()
-
-        # Application data
-        data_dict = { # Dictionary to be exported to json file
-            "Monitor App": {
-                "Export Timestamp": export_timestamp,
-                "Servers": list(self.get_servers()),
-                "Event Logs": {
-                    server: {} for server in self.get_servers()
-                }
-            }
-        }
-    
-        # Thread data
-        for thread in self.get_all_threads():
-            data_dict["Monitor App"]["Event Logs"][thread.get_server_name()][thread.get_log_type()] = {
-                "Thread Start Timestamp": thread.latest_start.timestamp(),
-                "Total Processed Events": thread.get_total_processed_events(),
-                "Total Thread Failures": thread.get_failure_total(),
-                "Event IDs": { # Value built below
-                    # 1111: {
-                    #   "Total": int,
-                    #   "Description": str or None,
-                    #   "Timestamps": [floats] or None
-                    # }
-                }
-            }
-            event_ID_key = data_dict["Monitor App"]["Event Logs"][thread.get_server_name()][thread.get_log_type()]["Event IDs"]
-            try: # Build Event IDs dictionary value for data_dict
-                for event_ID in thread.event_IDs:
-                    event_ID_key[event_ID] = {
-                        "Total": thread.get_total_event_occurrences(event_ID),
-                        "Description": thread.get_event_description(event_ID),
-                        "Timestamps": thread.get_event_occurrence_times(event_ID)
-                    }
-            except KeyError as err:
-                print(err)
-
-        # Create log directory
-        if not os.path.exists(os.path.join("windowseventmonitor", "eventlogs")):
-            os.mkdir(os.path.join("windowseventmonitor", "eventlogs"))
-        
-        event_log_json_file = os.path.join("windowseventmonitor", "eventlogs", f"{export_timestamp}.json")
-        try: # Write to json
-            with open(event_log_json_file, "w") as f:
-                data = json.dumps(data_dict, indent = 4)
-                f.write(data)
-            print("Exported logs")
-        except PermissionError as err:
-            print(err)
-
-
-    def get_active_threads(self):
-        return self.active_threads
-
-
-    def get_all_threads(self):
-        return self.active_threads + self.threads_to_restart
-
-
-    def get_dead_threads(self):
-        return self.threads_to_restart
-
-
-    def get_export_delta(self):
-        return self.export_delta
-
-
-    def get_retry_delta(self):
-        return self.retry_delta
-
-
-    def get_servers(self):
-        return self.servers
-
-
-    def remove_respawned_threads(self):
-        self.threads_to_restart = [thread for thread in self.get_dead_threads() if thread.restart_time != None]
-
-
-    def remove_dead_threads(self):
-        self.active_threads = [thread for thread in self.get_active_threads() if not thread.acknowledged_failure]
\ No newline at end of file
+import concurrent.futures
+import heapq
+import itertools
+import logging
+import logging.handlers
+import queue
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+import win32api
+import win32event
+
+from windowseventmonitor import monitor
+from windowseventmonitor.monitor import json_dumps, json_loads
+
+logger = logging.getLogger(__name__)
+
+
+
+class Event_Monitor:
+    """
+    Class is an application that monitors Windows Event Logs.
+
+    Parameter config_file (string): File containing necessary data
+
+    Parameter retry_delta (datetime.timedelta): Kwarg that sets how
+    often the program should attempt to resubscribe failed monitors.
+    Defaults to 5 minutes.
+
+    Parameter export_delta (datetime.timedelta): Kwarg that sets how
+    often the program exports data. Defaults to 1 hour.
+    """
+    def __init__(self, config_file, retry_delta = timedelta(minutes = 5), export_delta = timedelta(hours = 1)):
+        try:
+            # Bytes in, no decode roundtrip — orjson parses bytes directly
+            with open(config_file, "rb") as config:
+                data = json_loads(config.read())
+        except:
+            raise FileNotFoundError("Config file not found")
+
+        self.app_start = datetime.now()
+        os.makedirs(monitor.EVENT_LOG_DIR, exist_ok = True) # Monitors stream into it below
+        self.monitors = []
+        self.servers = set()
+        event_descriptions = data.get("Event Descriptions", {})
+        for server in data["Servers"]:
+            self.servers.add(server)
+            for log_type in data["Servers"][server]:
+                event_IDs = data["Servers"][server][log_type]
+                self.monitors.append(monitor.Monitor(server, log_type, event_IDs, event_descriptions.get(log_type, {})))
+        self.retry_delta = retry_delta
+        self.export_delta = export_delta
+        self.interrupt_signal = win32event.CreateEvent(None, 1, 0, None) # Manual-reset event
+
+        # Event output goes through a queue so formatting and console
+        # I/O happen on the listener thread, not the monitor loop
+        log_queue = queue.SimpleQueue()
+        package_logger = logging.getLogger("windowseventmonitor")
+        package_logger.setLevel(logging.INFO)
+        package_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        self.log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+        self.log_listener.start()
+        self.export_pool = concurrent.futures.ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "export")
+
+
+    def run(self):
+        """
+        Main thread of execution. run() subscribes every Monitor, then
+        waits on their signal handles with WaitForMultipleObjects and
+        drains whichever log has new records. If a subscription fails,
+        run() attempts to resubscribe it after retry_delta in case the
+        problem is temporary.
+
+        Stoppable with Ctrl+C.
+        """
+        # Deadlines are monotonic floats, immune to wall-clock jumps and
+        # cheaper to compare than datetime arithmetic
+        retry_seconds = self.get_retry_delta().total_seconds()
+        export_seconds = self.get_export_delta().total_seconds()
+        next_export = time.monotonic() + export_seconds
+
+        restart_heap = [] # (deadline, sequence, Monitor), earliest deadline first
+        sequence = itertools.count() # Tie-breaker so Monitors are never compared
+
+        def schedule_restart(mon):
+            mon.restart_time = time.monotonic() + retry_seconds
+            heapq.heappush(restart_heap, (mon.restart_time, next(sequence), mon))
+            logger.warning("%s failed. Will attempt restart in %s", mon.name, self.get_retry_delta())
+
+        for mon in self.get_monitors():
+            if not mon.subscribe():
+                schedule_restart(mon)
+
+        def console_ctrl_handler(ctrl_type):
+            win32event.SetEvent(self.interrupt_signal)
+            return True
+        win32api.SetConsoleCtrlHandler(console_ctrl_handler, True)
+
+        wait_set_dirty = True # Rebuild the wait set only after restart-state changes
+        try:
+            while True:
+                if wait_set_dirty:
+                    active = [mon for mon in self.get_monitors() if mon.restart_time == None]
+                    signals = [self.interrupt_signal] + [mon.signal for mon in active]
+                    wait_set_dirty = False
+
+                # Sleep until the next export or restart is due, or a log signals
+                next_deadline = next_export
+                if restart_heap:
+                    next_deadline = min(next_deadline, restart_heap[0][0])
+                timeout = max(0, int((next_deadline - time.monotonic()) * 1000))
+
+                index = win32event.WaitForMultipleObjects(signals, False, timeout)
+                if index == win32event.WAIT_OBJECT_0: # Ctrl+C
+                    raise KeyboardInterrupt
+                if index != win32event.WAIT_TIMEOUT:
+                    mon = active[index - win32event.WAIT_OBJECT_0 - 1]
+                    if not mon.drain_events():
+                        schedule_restart(mon)
+                        wait_set_dirty = True
+
+                # Pop only the monitors whose restart is due
+                now = time.monotonic()
+                while restart_heap and restart_heap[0][0] <= now:
+                    _, _, mon = heapq.heappop(restart_heap)
+                    logger.info("Attempting to restart %s", mon.name)
+                    mon.restart_time = None
+                    if not mon.subscribe():
+                        schedule_restart(mon)
+                    wait_set_dirty = True
+
+                # Export after time specified by delta
+                if time.monotonic() >= next_export:
+                    self.export_json()
+                    for mon in self.get_monitors():
+                        mon.rotate_event_stream()
+                    next_export = time.monotonic() + export_seconds
+
+        except KeyboardInterrupt:
+            logger.info("Keyboard interrupt")
+        except Exception as err:
+            logger.error(err)
+        finally: # Save necessary data before exit
+            self.export_json()
+            self.export_pool.shutdown(wait = True) # Final export must finish
+            for mon in self.get_monitors():
+                mon.close_event_stream()
+            self.log_listener.stop()
+            print("Exiting program")
+            sys.exit(0)
+
+
+    def export_json(self):
+        """
+        Snapshots every monitor's data and submits the json write to
+        the export worker, so the monitor loop returns to draining
+        logs without waiting on serialization or disk I/O.
+        """
+        export_timestamp = datetime.now().timestamp()
+
+        # Group snapshots by server for the nested layout
+        snapshots_by_server = {}
+        for mon in self.get_monitors():
+            snapshots_by_server.setdefault(mon.get_server_name(), []).append(mon.to_export_dict())
+            # The export owns this window's timestamps now; dropping
+            # them keeps per-monitor memory bounded by one export
+            # interval. Counts and totals stay cumulative.
+            mon.reset_all_event_times_of_occurrence()
+
+        self.export_pool.submit(self.write_export, export_timestamp, list(self.get_servers()), snapshots_by_server)
+
+
+    def write_export(self, export_timestamp, servers, snapshots_by_server):
+        """
+        Writes one export snapshot to a json file. Runs on the export
+        worker. The outer scaffold is written directly and each event
+        ID's entry is encoded separately, so peak memory during export
+        is bounded by the largest single entry rather than the full
+        accumulated data.
+        """
+        event_log_json_file = os.path.join(monitor.EVENT_LOG_DIR, f"{export_timestamp}.json")
+        try: # Write to json
+            # Large buffer coalesces the many small scaffold writes
+            with open(event_log_json_file, "wb", buffering = 1 << 20) as f:
+                f.write(b'{"Monitor App":{"Export Timestamp":')
+                f.write(json_dumps(export_timestamp))
+                f.write(b',"Servers":')
+                f.write(json_dumps(servers))
+                f.write(b',"Event Logs":{')
+                for server_index, (server, snapshots) in enumerate(snapshots_by_server.items()):
+                    if server_index:
+                        f.write(b",")
+                    f.write(json_dumps(server) + b":{")
+                    for snapshot_index, snapshot in enumerate(snapshots):
+                        if snapshot_index:
+                            f.write(b",")
+                        f.write(json_dumps(snapshot["log_type"]) + b":")
+                        f.write(b'{"Monitor Start Timestamp":')
+                        f.write(json_dumps(snapshot["start_timestamp"]))
+                        f.write(b',"Total Processed Events":')
+                        f.write(json_dumps(snapshot["total_processed_events"]))
+                        f.write(b',"Total Monitor Failures":')
+                        f.write(json_dumps(snapshot["failures"]))
+                        f.write(b',"Event IDs":{')
+                        for event_ID_index, event_ID in enumerate(snapshot["event_IDs"]):
+                            if event_ID_index:
+                                f.write(b",")
+                            f.write(snapshot["event_ID_keys"][event_ID_index] + b":")
+                            # default converts array.array timestamps at emit time
+                            f.write(json_dumps({
+                                "Total": snapshot["counts"][event_ID_index],
+                                "Description": snapshot["descriptions"].get(event_ID),
+                                "Timestamps": snapshot["times"][event_ID_index]
+                            }, default = list))
+                        f.write(b"}}")
+                    f.write(b"}")
+                f.write(b"}}}")
+            logger.info("Exported logs")
+        except PermissionError as err:
+            logger.error(err)
+
+
+    def get_monitors(self):
+        return self.monitors
+
+
+    def get_export_delta(self):
+        return self.export_delta
+
+
+    def get_retry_delta(self):
+        return self.retry_delta
+
+
+    def get_servers(self):
+        return self.servers
@@ -0,0 +1,328 @@
+import array
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from collections import defaultdict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+import win32event
+import win32evtlog
+
+logger = logging.getLogger(__name__)
+
+
+def json_dumps(obj, default = None):
+    """
+    Encodes obj to json bytes with orjson, falling back to the
+    (slower) stdlib encoder when orjson is not installed.
+    """
+    if orjson != None:
+        return orjson.dumps(obj, default = default)
+    return json.dumps(obj, default = default).encode()
+
+
+def json_loads(data):
+    """
+    Decodes json bytes with orjson, falling back to the (slower)
+    stdlib decoder when orjson is not installed.
+    """
+    if orjson != None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+EVENT_LOG_DIR = os.path.join("windowseventmonitor", "eventlogs")
+EPOCH = datetime(1970, 1, 1, tzinfo = timezone.utc)
+STREAM_BUFFER_LINES = 128
+STREAM_BUFFER_BYTES = 64 * 1024
+
+
+
+class Monitor:
+    """
+    Holds the subscription and processed data for one log on one server.
+    Monitors are driven by the Event_Monitor class, which waits on their
+    signal handles and drains whichever log has new records.
+
+    Parameter server (string): Specifies hostname.
+
+    Parameter log_type (string): Specifies log to check for events. Possible values
+    include "System", "Security", etc.
+
+    Parameter event_IDs (list): Specifies event IDs to monitor in log_type, as integers.
+
+    Parameter event_descriptions (dict): Specifies descriptions for log_type's
+    events, keyed by event ID string as in the config file.
+    """
+    __slots__ = (
+        "initial_start_timestamp", "latest_start", "start_date", "server_name",
+        "log_type", "event_IDs", "event_ID_set", "event_ID_index", "event_ID_keys",
+        "event_query",
+        "event_counts", "event_times", "total_processed_events", "name",
+        "failures", "restart_time", "signal",
+        "subscription", "render_context", "event_descriptions", "stream_date",
+        "event_stream", "stream_buffer", "stream_buffer_bytes"
+    )
+
+    def __init__(self, server, log_type, event_IDs, event_descriptions):
+        now = datetime.now()
+        self.initial_start_timestamp = now.timestamp()
+        self.latest_start = now
+        self.start_date = now.date()
+        self.server_name = server
+        self.log_type = log_type
+        self.event_IDs = tuple(dict.fromkeys(event_IDs)) # Dedupe, keep config order
+        self.event_ID_set = frozenset(event_IDs)
+        # Dense per-ID storage: counts and timestamp arrays live in slots
+        # indexed by event_ID_index instead of hash-keyed dicts
+        self.event_ID_index = {event_ID: index for index, event_ID in enumerate(self.event_IDs)}
+        # json object keys are strings; encode each ID's key bytes once
+        self.event_ID_keys = tuple(json_dumps(str(event_ID)) for event_ID in self.event_IDs)
+        self.event_query = self.build_event_query()
+        self.event_counts = array.array("Q", [0] * len(self.event_IDs))
+        self.event_times = [array.array("d") for _ in self.event_IDs] # 8 bytes per timestamp
+        self.total_processed_events = 0
+        self.name = f"{self.log_type}_{self.server_name}"
+        self.failures = 0
+        self.restart_time = None
+        self.signal = win32event.CreateEvent(None, 0, 0, None) # Auto-reset event
+        self.subscription = None
+        self.render_context = None
+        self.event_descriptions = { # Dictionary comprehension
+            int(event): event_descriptions[event] # Event IDs in json are strings
+                for event in event_descriptions
+                    if int(event) in self.get_event_IDs()
+        }
+        self.stream_buffer = []
+        self.stream_buffer_bytes = 0
+        self.open_event_stream()
+
+
+    def build_event_query(self):
+        """
+        Builds an XPath query for the monitored event IDs so the
+        Event Log service filters records before they reach Python.
+
+        Returns string.
+        """
+        ID_clause = " or ".join(f"EventID={event_ID}" for event_ID in self.get_event_IDs())
+        return f"*[System[({ID_clause})]]"
+
+
+    def subscribe(self):
+        """
+        Subscribes to the local or remote machine's log with
+        win32evtlog.EvtSubscribe. New records set this monitor's
+        signal handle, which Event_Monitor waits on.
+
+        Returns True on success, False on failure.
+        """
+        try:
+            if self.get_server_name().lower() in ("localhost", "."):
+                session = None
+            else:
+                session = win32evtlog.EvtOpenSession((self.get_server_name(), None, None, None, 0), win32evtlog.EvtRpcLogin)
+            self.subscription = win32evtlog.EvtSubscribe(
+                self.get_log_type(),
+                win32evtlog.EvtSubscribeToFutureEvents,
+                SignalEvent = self.signal,
+                Query = self.event_query,
+                Session = session
+            )
+            self.render_context = win32evtlog.EvtCreateRenderContext(win32evtlog.EvtRenderContextSystem)
+        except Exception as err:
+            logger.error(err)
+            self.add_failure()
+            return False
+
+        self.latest_start = datetime.now()
+        logger.info("Monitor for %s logs on %s started successfully.", self.get_log_type(), self.get_server_name())
+        return True
+
+
+    def drain_events(self):
+        """
+        Processes all records pending on this monitor's subscription
+        with win32evtlog.EvtNext in batches of 1024.
+
+        Returns True when the subscription is drained, False on failure.
+        """
+        # Hoist attribute and method lookups out of the per-event loop
+        evt_next = win32evtlog.EvtNext
+        evt_render = win32evtlog.EvtRender
+        render_values = win32evtlog.EvtRenderEventValues
+        system_event_ID = win32evtlog.EvtSystemEventID
+        system_time_created = win32evtlog.EvtSystemTimeCreated
+        subscription = self.subscription
+        render_context = self.render_context
+        event_ID_set = self.event_ID_set
+        server_name = self.get_server_name()
+        descriptions = self.event_descriptions
+        log_event = logger.info
+
+        while True:
+            try:
+                events = evt_next(subscription, 1024)
+            except Exception as err:
+                logger.error(err)
+                self.add_failure()
+                return False
+
+            if not events:
+                return True
+
+            event_IDs = []
+            timestamps = []
+            for event in events:
+                values = evt_render(event, render_values, Context = render_context)
+                event_ID = values[system_event_ID][0]
+                if event_ID not in event_ID_set: # Residual check; service filters via event_query
+                    continue
+                time_generated = values[system_time_created][0]
+                event_IDs.append(event_ID)
+                # EvtRender returns UTC-aware times, so this is fixed-offset
+                # arithmetic with no timezone database lookup per event
+                timestamps.append((time_generated - EPOCH).total_seconds())
+                # %-style formatting is deferred until a handler accepts the record
+                log_event(
+                    "Event ID: %s | Server: %s | Description: %s | Time: %s",
+                    event_ID, server_name, descriptions.get(event_ID), time_generated
+                )
+
+            if event_IDs:
+                self.add_event_details(event_IDs, timestamps)
+
+
+    def open_event_stream(self):
+        """Opens this monitor's dated NDJSON event stream in append mode."""
+        self.stream_date = datetime.now().date()
+        stream_file = os.path.join(EVENT_LOG_DIR, f"{self.name}_{self.stream_date}.ndjson")
+        self.event_stream = open(stream_file, "ab")
+
+
+    def flush_event_stream(self):
+        """Writes all buffered NDJSON lines to the event stream in one call."""
+        if self.stream_buffer:
+            self.event_stream.write(b"".join(self.stream_buffer))
+            self.stream_buffer.clear()
+            self.stream_buffer_bytes = 0
+
+
+    def rotate_event_stream(self):
+        """
+        Flushes buffered lines and reopens the NDJSON event stream
+        dated today if the date has changed.
+        """
+        self.flush_event_stream()
+        if datetime.now().date() != self.stream_date:
+            self.event_stream.close()
+            self.open_event_stream()
+
+
+    def close_event_stream(self):
+        self.flush_event_stream()
+        self.event_stream.close()
+
+
+    def add_event_details(self, event_IDs, timestamps):
+        """
+        Records one EvtNext batch of events: bulk-increments event
+        occurrences and total processed events, extends each event's
+        timestamp array, and appends one NDJSON line per event to the
+        event stream. Batching amortizes the per-event dict and
+        attribute work across the batch.
+        """
+        for event_ID, timestamp in zip(event_IDs, timestamps):
+            line = json_dumps({"id": event_ID, "timestamp": timestamp}) + b"\n"
+            self.stream_buffer.append(line)
+            self.stream_buffer_bytes += len(line)
+        if len(self.stream_buffer) >= STREAM_BUFFER_LINES or self.stream_buffer_bytes >= STREAM_BUFFER_BYTES:
+            self.flush_event_stream()
+
+        grouped_times = defaultdict(list)
+        for event_ID, timestamp in zip(event_IDs, timestamps):
+            grouped_times[event_ID].append(timestamp)
+
+        # Counts come from the group sizes, so grouping is the only
+        # per-event hash and each slot is resolved once per batch
+        index = self.event_ID_index
+        for event_ID, batch_times in grouped_times.items():
+            slot = index[event_ID]
+            self.event_counts[slot] += len(batch_times)
+            self.event_times[slot].extend(batch_times)
+        self.total_processed_events += len(event_IDs)
+
+
+    def to_export_dict(self):
+        """
+        Returns a snapshot dictionary of this monitor's data for
+        export. Counts and timestamps are copied so the export worker
+        never reads live state.
+        """
+        return {
+            "log_type": self.get_log_type(),
+            "start_timestamp": self.latest_start.timestamp(),
+            "total_processed_events": self.get_total_processed_events(),
+            "failures": self.get_failure_total(),
+            "event_IDs": self.event_IDs,
+            "event_ID_keys": self.event_ID_keys,
+            "descriptions": self.event_descriptions,
+            "counts": self.event_counts[:],
+            "times": [times[:] for times in self.event_times]
+        }
+
+
+    def add_failure(self):
+        self.failures += 1
+
+
+    def get_failure_total(self):
+        return self.failures
+
+
+    def get_event_IDs(self):
+        return self.event_IDs
+
+
+    def get_log_type(self):
+        return self.log_type
+
+
+    def get_total_event_occurrences(self, event_ID):
+        return self.event_counts[self.event_ID_index[event_ID]]
+
+
+    def get_event_occurrence_times(self, event_ID):
+        return self.event_times[self.event_ID_index[event_ID]]
+
+
+    def get_total_processed_events(self):
+        return self.total_processed_events
+
+
+    def get_event_description(self, event_ID):
+        return self.event_descriptions.get(event_ID)
+
+
+    def get_server_name(self):
+        return self.server_name
+
+
+    def get_monitor_name(self):
+        return self.name
+
+
+    def reset_all_event_occurrences(self):
+        self.event_counts = array.array("Q", [0] * len(self.event_IDs))
+
+
+    def reset_all_event_times_of_occurrence(self):
+        self.event_times = [array.array("d") for _ in self.event_IDs]
+
+
+    def reset_all_processed_events(self):
+        self.total_processed_events = 0